@@ -1,102 +1,440 @@
 import streamlit as st
 import google.generativeai as genai
-import json
 import re
+import heapq
 from dotenv import load_dotenv
 import os
 import io
+import html
+import shutil
+import subprocess
+import hashlib
+import sqlite3
+import time
+import tempfile
+import threading
+import multiprocessing
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import closing
+try:
+    # orjson parses Gemini's JSON several times faster than the standard library
+    import orjson as json_parser
+except ImportError:
+    import json as json_parser
 from docx import Document
-from PyPDF2 import PdfReader
+from rank_bm25 import BM25Okapi
+from pdf_worker import extract_page_range
+try:
+    import pymupdf
+except ImportError:
+    # PyMuPDF is AGPL-licensed; deployments that leave it out fall back to pure-Python pypdf
+    pymupdf = None
+    from pypdf import PdfReader
 
 # Load API key from .env file
 load_dotenv()
 api_key = os.getenv("GEMINI_API_KEY")
 genai.configure(api_key=api_key)
 
-# Initialize the Gemini Pro model
-# Using a stable, recommended model
-model = genai.GenerativeModel('gemini-1.5-flash')
+@st.cache_resource
+def get_model():
+    """Initializes the Gemini Pro model once per process instead of on every rerun."""
+    # Using a stable, recommended model
+    return genai.GenerativeModel('gemini-1.5-flash')
 
-def get_gemini_response(input_text):
-    """Sends the contract text to the Gemini API and returns the parsed JSON response."""
-    
-    # Comprehensive prompt for the Gemini model to extract all required information
-    # The prompt is updated to specifically ask for the 'End of Contract' field.
-    prompt = f"""
+def warm_up_model(model):
+    """Opens the connection to Gemini ahead of the analysis request; failures are left to the real call."""
+    try:
+        model.count_tokens("warm up")
+    except Exception:
+        pass
+
+@st.cache_resource
+def start_model_warm_up():
+    """Warms up the Gemini connection in the background, once per process."""
+    # Later runs reuse the open channel, so warming up again would only spend API quota
+    thread = threading.Thread(target=warm_up_model, args=(get_model(),), daemon=True)
+    thread.start()
+    return thread
+
+# Poppler's pdftotext is the fastest extractor when it is installed
+PDFTOTEXT = shutil.which("pdftotext")
+# Each backend lays text out differently, so it is part of the extracted-text cache key
+PDF_BACKEND = "pdftotext" if PDFTOTEXT else "pymupdf" if pymupdf else "pypdf"
+
+# Uploads larger than 200 MB are rejected
+MAX_UPLOAD_BYTES = 200 * 1024 * 1024
+
+# Soft cap on extracted text; contracts longer than this would not fit Gemini's context anyway
+MAX_CHARS = 800_000
+
+# PyMuPDF is not thread-safe, so long PDFs are split across worker processes in ranges of
+# PAGES_PER_TASK pages. A text page takes ~1.3 ms serially, and a warm worker adds ~3-7 ms per
+# task, so 25-page tasks keep that overhead near 10-20% and a PDF needs two tasks to benefit.
+PDF_WORKERS = os.cpu_count() or 1
+PAGES_PER_TASK = 25
+PARALLEL_MIN_PAGES = 2 * PAGES_PER_TASK
+
+# Fields extracted from the contract, with the guidance Gemini gets for each one
+ANALYSIS_FIELDS = {
+    "Contract Type": "The type of agreement (e.g., Service Agreement, Lease, NDA).",
+    "Address": "The address mentioned in the contract.",
+    "Entry Date": "The date the contract was entered into.",
+    "Contract Party": "The names of the parties involved in the contract.",
+    "Termination Date": "Any date or clause specifying when the contract can be terminated.",
+    "End of Contract": "The specific end date or duration of the contract.",
+    "Executive Summary": "A concise summary of the contract's purpose and key terms.",
+    "Scope of Service": "A description of the services or work to be performed.",
+    "Responsibilities for Deliverables": "A summary of each party's responsibilities and the deliverables they are accountable for.",
+    "Payment Schedule": "Details on how and when payments will be made.",
+    "Tax Compliance": "Any clauses related to tax responsibilities and compliance.",
+    "Important Dates and Deadlines": "A list of all significant dates and deadlines mentioned in the contract.",
+    "Termination Clauses": "Conditions under which the contract can be terminated by either party.",
+    "Confidentiality and Non-Compete Clause": "Details of any confidentiality agreements and non-compete restrictions.",
+}
+
+# Clauses whose presence is reported as Yes/No, grouped as in the UI
+CLAUSE_GROUPS = {
+    "Commercial": ["Payment Terms", "IP", "Delivery Time", "Warranty"],
+    "Legal": ["Indemnification", "Termination", "Confidentiality", "Limitation of Liability"],
+}
+
+def object_schema(properties):
+    """Builds a response schema for an object whose properties are all required."""
+    return {"type": "object", "properties": properties, "required": list(properties)}
+
+YES_NO_SCHEMA = {"type": "string", "format": "enum", "enum": ["Yes", "No"]}
+
+# Gemini's structured output guarantees well-formed JSON in exactly this shape
+GENERATION_CONFIG = {
+    "response_mime_type": "application/json",
+    "response_schema": object_schema({
+        **{field: {"type": "string", "description": description} for field, description in ANALYSIS_FIELDS.items()},
+        "Clauses Presence": object_schema({
+            group: object_schema({clause: YES_NO_SCHEMA for clause in clauses})
+            for group, clauses in CLAUSE_GROUPS.items()
+        }),
+    }),
+}
+
+# Search terms used to find the sections of a long contract that are relevant to each field
+FIELD_KEYWORDS = {
+    "Contract Type": ["agreement", "contract", "lease", "nda", "services"],
+    "Address": ["address", "located", "street", "premises", "office"],
+    "Entry Date": ["dated", "effective", "date", "entered", "made"],
+    "Contract Party": ["between", "party", "parties", "hereinafter", "company"],
+    "Termination Date": ["terminate", "termination", "date", "expire", "expiry"],
+    "End of Contract": ["term", "expire", "expiration", "duration", "end", "renewal"],
+    "Executive Summary": ["purpose", "whereas", "agreement", "recitals", "background"],
+    "Scope of Service": ["scope", "services", "work", "perform", "provide"],
+    "Responsibilities for Deliverables": ["responsibilities", "deliverables", "obligations", "deliver", "accountable"],
+    "Payment Schedule": ["payment", "invoice", "fee", "fees", "pay", "compensation"],
+    "Tax Compliance": ["tax", "taxes", "gst", "vat", "withholding", "compliance"],
+    "Important Dates and Deadlines": ["date", "deadline", "within", "days", "milestone"],
+    "Termination Clauses": ["terminate", "termination", "breach", "notice", "cure"],
+    "Confidentiality and Non-Compete Clause": ["confidential", "confidentiality", "disclose", "compete", "solicit"],
+    "Commercial": ["payment", "intellectual", "property", "delivery", "warranty"],
+    "Legal": ["indemnify", "indemnification", "termination", "confidentiality", "liability", "limitation"],
+}
+
+# Number of best-matching sections kept per field; shorter contracts are sent whole
+SECTIONS_PER_FIELD = 20
+
+# Sections are blocks between blank lines. PDF extractors rarely emit blank lines, so blocks are
+# further cut into windows of SECTION_MAX_LINES lines, roughly a paragraph of PDF text.
+SECTION_BREAK = re.compile(r"\n\s*\n")
+SECTION_MAX_LINES = 10
+WORD = re.compile(r"\w+")
+HORIZONTAL_SPACE = re.compile(r"[^\S\n]+")
+
+# Running headers and footers are lines within HEADER_FOOTER_LINES of a page's top or bottom that
+# repeat on at least REPEATED_LINE_MIN_PAGES pages. The length floor keeps list markers and short
+# table cells such as "(a)", "1." or "N/A" from ever being treated as one. This assumes headers and
+# footers come out first and last on each page: pdftotext's default reading-order mode lays them out
+# that way, while PyMuPDF and pypdf follow content-stream order, where most producers draw them
+# first or last but some do not, leaving those headers in place.
+HEADER_FOOTER_LINES = 3
+REPEATED_LINE_MIN_PAGES = 3
+REPEATED_LINE_MIN_CHARS = 4
+
+# The response schema describes every field, so the prompt only wraps the contract itself.
+# The text around the contract never changes and is built once here.
+PROMPT_HEAD = """
     You are an expert contract analyzer. Your task is to analyze the following contract text and extract key insights.
     
-    The output should be a single JSON object with the following structure:
-    {{
-      "Contract Type": "The type of agreement (e.g., Service Agreement, Lease, NDA).",
-      "Address": "The address mentioned in the contract.",
-      "Entry Date": "The date the contract was entered into.",
-      "Contract Party": "The names of the parties involved in the contract.",
-      "Termination Date": "Any date or clause specifying when the contract can be terminated.",
-      "End of Contract": "The specific end date or duration of the contract.",
-      "Executive Summary": "A concise summary of the contract's purpose and key terms.",
-      "Scope of Service": "A description of the services or work to be performed.",
-      "Responsibilities for Deliverables": "A summary of each party's responsibilities and the deliverables they are accountable for.",
-      "Payment Schedule": "Details on how and when payments will be made.",
-      "Tax Compliance": "Any clauses related to tax responsibilities and compliance.",
-      "Important Dates and Deadlines": "A list of all significant dates and deadlines mentioned in the contract.",
-      "Termination Clauses": "Conditions under which the contract can be terminated by either party.",
-      "Confidentiality and Non-Compete Clause": "Details of any confidentiality agreements and non-compete restrictions.",
-      "Clauses Presence": {{
-        "Commercial": {{
-          "Payment Terms": "Yes/No",
-          "IP": "Yes/No",
-          "Delivery Time": "Yes/No",
-          "Warranty": "Yes/No"
-        }},
-        "Legal": {{
-          "Indemnification": "Yes/No",
-          "Termination": "Yes/No",
-          "Confidentiality": "Yes/No",
-          "Limitation of Liability": "Yes/No"
-        }}
-      }}
-    }}
-    
     Analyze the following contract text:
     ---
-    {input_text}
+    """
+PROMPT_TAIL = """
     ---
     """
-    
+
+# Bump the prompt version whenever the prompt changes so stale analyses are not reused
+PROMPT_VERSION = "v4"
+
+# Bump the extractor version whenever extraction output changes so stale text is not reused
+EXTRACTOR_VERSION = "v4"
+
+# Analyses and extracted text are cached on disk by content hash for 7 days
+CACHE_PATH = os.path.expanduser("~/.contract_analyzer_cache.db")
+CACHE_TTL_SECONDS = 7 * 24 * 60 * 60
+LLM_CACHE = "llm_cache"
+TEXT_CACHE = "text_cache"
+
+def cache_connect():
+    """Opens the on-disk cache, creating its tables on first use."""
+    conn = sqlite3.connect(CACHE_PATH)
+    for table in (LLM_CACHE, TEXT_CACHE):
+        conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+    return conn
+
+def cache_get(table, key):
+    """Returns the cached value for a key, or None if it is missing or expired."""
     try:
-        response = model.generate_content(prompt)
-        # The API might sometimes add extra text before/after the JSON.
-        json_match = re.search(r'```json\n(.*)\n```', response.text, re.DOTALL)
-        if json_match:
-            json_str = json_match.group(1)
-        else:
-            json_str = response.text
-            
-        return json.loads(json_str)
+        with closing(cache_connect()) as conn:
+            row = conn.execute(
+                f"SELECT value FROM {table} WHERE key = ? AND expires_at > ?", (key, time.time())
+            ).fetchone()
+    except sqlite3.Error:
+        return None
+    return row[0] if row else None
+
+def cache_set(table, key, value):
+    """Stores a value in the on-disk cache. A failing cache never breaks the analysis."""
+    now = time.time()
+    try:
+        with closing(cache_connect()) as conn, conn:
+            # Evict expired entries so the database does not grow without bound
+            conn.execute(f"DELETE FROM {table} WHERE expires_at <= ?", (now,))
+            conn.execute(
+                f"INSERT OR REPLACE INTO {table} (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, value, now + CACHE_TTL_SECONDS),
+            )
+    except sqlite3.Error:
+        pass
+
+def split_sections(input_text):
+    """Splits contract text into blocks between blank lines, each at most SECTION_MAX_LINES lines long."""
+    sections = []
+    for block in SECTION_BREAK.split(input_text):
+        lines = block.strip().splitlines()
+        for start in range(0, len(lines), SECTION_MAX_LINES):
+            sections.append("\n".join(lines[start:start + SECTION_MAX_LINES]))
+    return sections
+
+def select_relevant_sections(input_text):
+    """Keeps only the contract sections that BM25 ranks among the best matches for some field."""
+    sections = split_sections(input_text)
+    if len(sections) <= SECTIONS_PER_FIELD:
+        return input_text
+
+    bm25 = BM25Okapi([WORD.findall(section.lower()) for section in sections])
+    keep = set()
+    for keywords in FIELD_KEYWORDS.values():
+        scores = bm25.get_scores(keywords)
+        # A field none of whose keywords occur would otherwise keep the first sections by default
+        if max(scores) <= 0:
+            continue
+        keep.update(heapq.nlargest(SECTIONS_PER_FIELD, range(len(sections)), key=scores.__getitem__))
+    if not keep:
+        return input_text
+
+    # Preserve the original order so the contract still reads top to bottom
+    return "\n\n".join(sections[i] for i in sorted(keep))
+
+@st.cache_data(ttl=CACHE_TTL_SECONDS, show_spinner=False)
+def analyze_contract(input_text):
+    """Returns the parsed analysis of the contract text, calling Gemini only on a cache miss."""
+    cache_key = f"{PROMPT_VERSION}:{hashlib.sha256(input_text.encode()).hexdigest()}"
+    cached = cache_get(LLM_CACHE, cache_key)
+    if cached is not None:
+        return json_parser.loads(cached)
+
+    prompt = PROMPT_HEAD + select_relevant_sections(input_text) + PROMPT_TAIL
+    response = get_model().generate_content(prompt, generation_config=GENERATION_CONFIG)
+    json_str = response.text
+
+    # Parse before caching so a malformed response is never stored
+    analysis = json_parser.loads(json_str)
+    cache_set(LLM_CACHE, cache_key, json_str)
+    return analysis
 
+def get_gemini_response(input_text):
+    """Sends the contract text to the Gemini API and returns the parsed JSON response."""
+    try:
+        return analyze_contract(input_text)
     except Exception as e:
         st.error(f"An error occurred: {e}")
         return None
 
-def extract_text_from_pdf(file_obj):
+def limit_chars(chunks):
+    """Yields text chunks, stopping early once MAX_CHARS characters have been produced."""
+    total = 0
+    for chunk in chunks:
+        yield chunk
+        total += len(chunk)
+        if total >= MAX_CHARS:
+            break
+
+@st.cache_resource
+def get_pdf_pool():
+    """Starts the PDF worker pool once per process; spawn avoids forking Streamlit's threads."""
+    return ProcessPoolExecutor(max_workers=PDF_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+
+def extract_pages_in_parallel(pdf_path, page_count):
+    """Yields the text of consecutive page ranges, keeping only one range per worker in flight."""
+    pool = get_pdf_pool()
+    pending = deque()
+    try:
+        for start in range(0, page_count, PAGES_PER_TASK):
+            pending.append(pool.submit(extract_page_range, pdf_path, start, min(start + PAGES_PER_TASK, page_count)))
+            if len(pending) >= PDF_WORKERS:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        # Once MAX_CHARS is reached, ranges that have not started are never extracted
+        for future in pending:
+            future.cancel()
+        wait(pending)
+
+def extract_pdf_in_parallel(pdf_bytes, page_count):
+    """Extracts PDF text on the worker pool, stopping once MAX_CHARS characters have been produced."""
+    # Workers open the PDF from disk instead of each receiving a pickled copy of the bytes
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        pdf_path = os.path.join(tmp_dir, "contract.pdf")
+        with open(pdf_path, "wb") as f:
+            f.write(pdf_bytes)
+        with closing(extract_pages_in_parallel(pdf_path, page_count)) as chunks:
+            return "".join(limit_chars(chunks))
+
+def extract_text_from_pdf(pdf_bytes):
     """Extracts text from a PDF file."""
-    reader = PdfReader(file_obj)
-    text = ""
-    for page in reader.pages:
-        text += page.extract_text() or ""
-    return text
+    if PDFTOTEXT:
+        try:
+            result = subprocess.run(
+                [PDFTOTEXT, "-q", "-", "-"],
+                input=pdf_bytes,
+                capture_output=True,
+                timeout=30,
+            )
+            if result.returncode == 0 and result.stdout:
+                return result.stdout.decode("utf-8", "ignore")[:MAX_CHARS]
+        except (OSError, subprocess.TimeoutExpired):
+            pass
+
+    if pymupdf is None:
+        reader = PdfReader(io.BytesIO(pdf_bytes))
+        return "".join(limit_chars((page.extract_text(extraction_mode="plain") or "") + "\f" for page in reader.pages))
+
+    # Fall back to PyMuPDF, which parses the content streams in C. Like pdftotext, every page
+    # ends with a form feed so repeated headers and footers can be found per page.
+    with pymupdf.open(stream=pdf_bytes, filetype="pdf") as doc:
+        if doc.page_count >= PARALLEL_MIN_PAGES and PDF_WORKERS > 1:
+            try:
+                return extract_pdf_in_parallel(pdf_bytes, doc.page_count)
+            except BrokenProcessPool:
+                # A worker died (e.g. out of memory on a huge PDF); start a fresh pool for later
+                # uploads and finish this one serially
+                get_pdf_pool().shutdown(wait=False)
+                get_pdf_pool.clear()
+        return "".join(limit_chars(page.get_text("text") + "\f" for page in doc))
 
-def extract_text_from_docx(file_obj):
+def extract_text_from_docx(docx_bytes):
     """Extracts text from a DOCX file."""
-    doc = Document(file_obj)
-    text = ""
-    for paragraph in doc.paragraphs:
-        text += paragraph.text + "\n"
+    doc = Document(io.BytesIO(docx_bytes))
+    return "\n".join(limit_chars(paragraph.text for paragraph in doc.paragraphs))
+
+def extract_text_cached(extractor, backend, file_bytes):
+    """Runs an extractor, reusing the text previously extracted from an identical file by the same backend."""
+    cache_key = f"{EXTRACTOR_VERSION}:{backend}:{hashlib.sha256(file_bytes).hexdigest()}"
+    text = cache_get(TEXT_CACHE, cache_key)
+    if text is None:
+        text = extractor(file_bytes)
+        cache_set(TEXT_CACHE, cache_key, text)
     return text
 
+def normalize_contract_text(contract_text):
+    """Collapses runs of whitespace and drops page headers and footers repeated across pages."""
+    pages = [
+        [HORIZONTAL_SPACE.sub(" ", line).strip() for line in page.splitlines()]
+        for page in contract_text.split("\f")
+    ]
+
+    # Count the pages on which each line appears near the top or bottom
+    edge_counts = Counter()
+    for page in pages:
+        text_lines = [line for line in page if line]
+        edge_counts.update(set(text_lines[:HEADER_FOOTER_LINES] + text_lines[-HEADER_FOOTER_LINES:]))
+    repeated = {
+        line for line, count in edge_counts.items()
+        if count >= REPEATED_LINE_MIN_PAGES and len(line) >= REPEATED_LINE_MIN_CHARS
+    }
+
+    seen = set()
+    lines = []
+    for page in pages:
+        text_count = sum(1 for line in page if line)
+        position = 0
+        for line in page:
+            if not line:
+                # Keep single blank lines, they separate the sections ranked by BM25
+                if lines and lines[-1]:
+                    lines.append("")
+                continue
+            at_edge = position < HEADER_FOOTER_LINES or position >= text_count - HEADER_FOOTER_LINES
+            position += 1
+            if at_edge and line in repeated:
+                # Keep the first occurrence of a header or footer, drop the copies on later pages
+                if line in seen:
+                    continue
+                seen.add(line)
+            lines.append(line)
+        # Page breaks separate sections too
+        if lines and lines[-1]:
+            lines.append("")
+    return "\n".join(lines).rstrip("\n")
+
+# Text extractors by MIME type, each taking the uploaded file's bytes
+EXTRACTORS = {
+    "application/pdf": lambda file_bytes: extract_text_cached(extract_text_from_pdf, PDF_BACKEND, file_bytes),
+    "application/vnd.openxmlformats-officedocument.wordprocessingml.document": (
+        lambda file_bytes: extract_text_cached(extract_text_from_docx, "python-docx", file_bytes)
+    ),
+    "text/plain": lambda file_bytes: file_bytes.decode("utf-8"),
+}
+
 # Streamlit UI
 st.set_page_config(page_title="Contract Analyzer 📄🔍")
 
+# Custom CSS for the colored boxes
+st.markdown("""
+<style>
+.kv-grid {
+    display: grid;
+    grid-template-columns: 1fr 4fr;
+    column-gap: 1rem;
+}
+.custom-box {
+    border-radius: 5px;
+    padding: 10px;
+    margin-bottom: 10px;
+    border: 1px solid #ddd;
+}
+.box-red { background-color: #ffe5e5; }
+.box-green { background-color: #e5ffe5; }
+.box-blue { background-color: #e5e5ff; }
+.box-purple { background-color: #f2e5ff; }
+.box-orange { background-color: #fff2e5; }
+.box-pink { background-color: #ffe5f2; }
+.box-yellow { background-color: #ffffcc; }
+</style>
+""", unsafe_allow_html=True)
+
 st.title("Contract Analyzer")
 st.markdown("### Powered by Gemini Pro API")
 
@@ -106,25 +444,24 @@ uploaded_file = st.file_uploader("Upload a contract file (PDF, DOCX, TXT)", type
 # Button to trigger the analysis
 if st.button("Analyze Contract"):
     if uploaded_file is not None:
-        # Check file size (200 MB = 200 * 1024 * 1024 bytes)
-        if uploaded_file.size > 200 * 1024 * 1024:
+        # Check the size Streamlit reports before touching the file content
+        if uploaded_file.size > MAX_UPLOAD_BYTES:
             st.error("File size exceeds the 200 MB limit. Please upload a smaller file.")
         else:
-            # Read the file content
-            file_content = uploaded_file.getvalue()
             contract_text = ""
+            # getvalue() returns the bytes Streamlit already holds without copying them;
+            # getbuffer() would force a full copy of the upload
+            file_content = uploaded_file.getvalue()
+
+            # Connect to Gemini in the background while the text is being extracted
+            start_model_warm_up()
 
             # Extract text based on file type
             try:
-                if uploaded_file.type == "application/pdf":
-                    st.info("Extracting text from PDF...")
-                    contract_text = extract_text_from_pdf(io.BytesIO(file_content))
-                elif uploaded_file.type == "application/vnd.openxmlformats-officedocument.wordprocessingml.document":
-                    st.info("Extracting text from DOCX...")
-                    contract_text = extract_text_from_docx(io.BytesIO(file_content))
-                elif uploaded_file.type == "text/plain":
-                    st.info("Reading text from TXT...")
-                    contract_text = file_content.decode("utf-8")
+                extractor = EXTRACTORS.get(uploaded_file.type)
+                if extractor:
+                    st.info(f"Extracting text from {uploaded_file.name}...")
+                    contract_text = normalize_contract_text(extractor(file_content))
                 
                 if contract_text:
                     with st.spinner('Analyzing contract... Please wait.⏳'):
@@ -133,25 +470,6 @@ if st.button("Analyze Contract"):
                         if analysis_data:
                             st.success("Analysis Complete! 🎉")
                             
-                            # Custom CSS for the colored boxes
-                            st.markdown("""
-                            <style>
-                            .custom-box {
-                                border-radius: 5px;
-                                padding: 10px;
-                                margin-bottom: 10px;
-                                border: 1px solid #ddd;
-                            }
-                            .box-red { background-color: #ffe5e5; }
-                            .box-green { background-color: #e5ffe5; }
-                            .box-blue { background-color: #e5e5ff; }
-                            .box-purple { background-color: #f2e5ff; }
-                            .box-orange { background-color: #fff2e5; }
-                            .box-pink { background-color: #ffe5f2; }
-                            .box-yellow { background-color: #ffffcc; }
-                            </style>
-                            """, unsafe_allow_html=True)
-                            
                             st.header("Key Contract Details")
                             
                             # Create a mapping of key to color class
@@ -164,15 +482,14 @@ if st.button("Analyze Contract"):
                                 "End of Contract": "box-pink"
                             }
                             
-                            # Display key details in colored boxes
-                            for key, color_class in box_colors.items():
-                                value = analysis_data.get(key, "N/A")
-                                # Use columns to create a two-part box for label and value
-                                col1, col2 = st.columns([1, 4])
-                                with col1:
-                                    st.markdown(f'<div class="custom-box {color_class}"><b>{key}</b></div>', unsafe_allow_html=True)
-                                with col2:
-                                    st.markdown(f'<div class="custom-box {color_class}">{value}</div>', unsafe_allow_html=True)
+                            # Display key details in colored boxes, rendered as a single element
+                            # with a two-column grid for label and value
+                            key_details = "".join(
+                                f'<div class="custom-box {color_class}"><b>{key}</b></div>'
+                                f'<div class="custom-box {color_class}">{html.escape(str(analysis_data.get(key, "N/A")))}</div>'
+                                for key, color_class in box_colors.items()
+                            )
+                            st.markdown(f'<div class="kv-grid">{key_details}</div>', unsafe_allow_html=True)
                                     
                             st.markdown("---")
                             st.header("Full Analysis")
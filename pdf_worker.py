@@ -0,0 +1,9 @@
+# Kept out of app.py so tasks sent to worker processes reference an importable module, not the Streamlit script
+def extract_page_range(pdf_path, start, stop):
+    """Extracts the text of pages start..stop-1 of a PDF file."""
+    # Imported here so app.py can load this module even where PyMuPDF is not installed
+    import pymupdf
+
+    with pymupdf.open(pdf_path) as doc:
+        # Every page ends with a form feed, matching pdftotext's output
+        return "".join(doc.load_page(i).get_text("text") + "\f" for i in range(start, stop))